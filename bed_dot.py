@@ -1,10 +1,15 @@
 import paho.mqtt.client as mqtt
 import matplotlib.pyplot as plt
+import numpy as np
+from collections import deque
 from datetime import datetime
 import time
 import argparse
+import signal
 import sys
 import random
+from live_view import LiveViewServer
+from soak_monitor import SoakMonitor
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description="MQTT Data Pipeline with Plotting")
@@ -12,22 +17,59 @@ def parse_arguments():
                         help="Target MQTT broker host (default: 75.131.29.55)")
     parser.add_argument('--topic', type=str, default="/unknown_org/74:4d:bd:89:2d:f4/vital",
                         help="MQTT topic for both source and target (default: /unknown_org/74:4d:bd:89:2d:f4/vital)")
+    parser.add_argument('--fs', '--sample-rate', type=float, default=100.0,
+                        help="Sample rate in Hz of array-valued (waveform) fields (default: 100)")
+    parser.add_argument('--serve', type=int, default=None, metavar='PORT',
+                        help="Serve a live view in the browser on this port instead of opening a Matplotlib window")
+    parser.add_argument('--serve-host', type=str, default="127.0.0.1",
+                        help="Address the live view listens on, use 0.0.0.0 to allow remote viewers (default: 127.0.0.1)")
+    parser.add_argument('--soak', type=str, default=None, metavar='FILE',
+                        help="Soak mode: periodically log memory, allocations, object counts, sockets and per-message CPU time to this file")
+    parser.add_argument('--soak-interval', type=float, default=60,
+                        help="Seconds between soak mode samples (default: 60)")
     return parser.parse_args()
 
+def parse_samples(value):
+    """
+    Decode a comma-separated list of samples into a NumPy array.
+    Returns None if any sample is not numeric.
+    """
+    # fromstring parses the whole field in C. Depending on the NumPy version
+    # a bad sample either raises or stops parsing early, so handle both.
+    try:
+        samples = np.fromstring(value, dtype=np.float64, sep=',')
+    except ValueError:
+        return None
+    if len(samples) != value.count(',') + 1:
+        return None
+    return samples
+
+def sample_times(timestamp, num_samples, sample_rate):
+    """
+    Timestamps in seconds for each sample of a waveform, where the
+    nanosecond message timestamp is the time of the first sample.
+    """
+    return timestamp / 1e9 + np.arange(num_samples) / sample_rate
+
 def parse_data(payload):
-    """Parse the semicolon-separated data string into a dictionary"""
+    """Parse the semicolon-separated data string into a dictionary.
+    Comma-separated (waveform) values are decoded into NumPy arrays."""
     data = {}
     first_timestamp = None
     try:
         pairs = payload.strip().split(';')
         for pair in pairs:
             if '=' in pair:
-                key, value = pair.strip().split('=')
+                key, value = pair.strip().split('=', 1)
                 # Keep only the first timestamp encountered
                 if 'timestamp' in key.lower():
                     if first_timestamp is None:
                         first_timestamp = float(value)
                     continue  # Skip adding this timestamp to data
+                if ',' in value:
+                    samples = parse_samples(value)
+                    data[key] = samples if samples is not None else value
+                    continue
                 try:
                     data[key] = float(value)
                 except ValueError:
@@ -43,7 +85,7 @@ def parse_data(payload):
         return None
 
 class MQTTDataPipeline:
-    def __init__(self, target_host, topic):
+    def __init__(self, target_host, topic, serve_port=None, sample_rate=100.0, soak=None, serve_host="127.0.0.1"):
         # Source broker settings (fixed)
         self.source_broker = "sensorweb.us"
         self.source_port = 1883
@@ -55,18 +97,38 @@ class MQTTDataPipeline:
         # Common topic for both source and target
         self.topic = topic
 
-        # Initialize plotting
-        plt.ion()
-        self.fig, self.ax = plt.subplots(figsize=(12, 6))
+        # Sample rate of waveform fields, used to timestamp each sample
+        self.sample_rate = sample_rate
+
+        # Initialize the live view server, or the Matplotlib figure when not serving
+        self.live_view = None
+        if serve_port:
+            self.live_view = LiveViewServer(
+                serve_port, f"Real-time Vital Signs - Source: {self.source_broker} → Target: {self.target_broker}",
+                host=serve_host)
+            self.live_view.start()
+        else:
+            plt.ion()
+            self.fig, (self.ax, self.wave_ax) = plt.subplots(2, 1, figsize=(12, 8))
         self.timestamps = []
         self.data_dict = {}
         self.color_dict = {}
 
+        # Last few waveform chunks per field as (sample times, samples) arrays.
+        # Each chunk is plotted as is, so samples are never copied or merged.
+        self.waveform_dict = {}
+        self.waveform_chunks = 5
+
+        # Redraw at most every plot_interval seconds, so drawing doesn't
+        # limit how fast messages are handled
+        self.plot_interval = 0.5
+        self.last_redraw = 0
+
         # MQTT clients
         self.source_client = mqtt.Client()
         self.target_client = mqtt.Client()
         self.source_client.on_connect = self.on_source_connect
-        self.source_client.on_message = self.on_message
+        self.source_client.on_message = soak.wrap(self.on_message) if soak else self.on_message
 
     def get_random_color(self):
         """Generate a random color"""
@@ -87,8 +149,8 @@ class MQTTDataPipeline:
             
             # Check if the payload contains 'heartrate'
             if 'heartrate=' in payload:
-                # Publish the raw payload to the target broker
-                time.sleep(2)
+                # Publish the raw payload to the target broker. This only
+                # queues it, the target client's own loop thread sends it.
                 self.target_client.publish(self.topic, payload)
                 
                 # Parse the payload
@@ -105,15 +167,34 @@ class MQTTDataPipeline:
         # Convert nanosecond timestamp to readable format
         timestamp = datetime.fromtimestamp(data['timestamp'] / 1e9).strftime("%H:%M:%S")
         
-        # Initialize data structures for new variables
+        # Numeric values of this message, excluding the timestamp
+        values = {key: value for key, value in data.items()
+                  if key != 'timestamp' and isinstance(value, (int, float))}
+
+        if self.live_view:
+            # Viewers draw the chart, only push the new point and waveform chunks
+            for key, value in data.items():
+                if isinstance(value, np.ndarray):
+                    self.live_view.push_waveform(key, data['timestamp'] / 1e9, self.sample_rate, value)
+            self.live_view.push(timestamp, values)
+            return
+
+        # Keep the newest waveform chunks, timestamped per sample
         for key, value in data.items():
-            # Only exclude 'timestamp' and ensure the value is numeric
-            if key != 'timestamp' and isinstance(value, (int, float)):
-                # Initialize data list if key is new
-                if key not in self.data_dict:
-                    self.data_dict[key] = []
+            if isinstance(value, np.ndarray):
+                if key not in self.waveform_dict:
+                    self.waveform_dict[key] = deque(maxlen=self.waveform_chunks)
                     self.color_dict[key] = self.get_random_color()
-                self.data_dict[key].append(value)
+                times = sample_times(data['timestamp'], len(value), self.sample_rate)
+                self.waveform_dict[key].append((times, value))
+
+        # Initialize data structures for new variables
+        for key, value in values.items():
+            # Initialize data list if key is new
+            if key not in self.data_dict:
+                self.data_dict[key] = []
+                self.color_dict[key] = self.get_random_color()
+            self.data_dict[key].append(value)
 
         # Update timestamps
         self.timestamps.append(timestamp)
@@ -126,6 +207,11 @@ class MQTTDataPipeline:
                 if len(self.data_dict[key]) > max_points:
                     self.data_dict[key].pop(0)
 
+        now = time.time()
+        if now - self.last_redraw < self.plot_interval:
+            return
+        self.last_redraw = now
+
         # Clear and redraw plot
         self.ax.clear()
 
@@ -142,8 +228,20 @@ class MQTTDataPipeline:
         # Only show legend if there are labels to display
         if self.data_dict:
             self.ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-        
-        plt.xticks(rotation=45)
+        self.ax.tick_params(axis='x', labelrotation=45)
+
+        # Plot waveform chunks, one line per chunk in the field's color
+        self.wave_ax.clear()
+        for key, chunks in self.waveform_dict.items():
+            for i, (times, samples) in enumerate(chunks):
+                self.wave_ax.plot(times, samples, linestyle='-', color=self.color_dict[key],
+                                  label=key if i == 0 else None)
+        self.wave_ax.set_xlabel("Time (s)")
+        self.wave_ax.set_ylabel("Samples")
+        self.wave_ax.set_title(f"Waveforms ({self.sample_rate:g} Hz)")
+        if self.waveform_dict:
+            self.wave_ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+
         plt.tight_layout()
         plt.pause(0.1)
 
@@ -155,6 +253,7 @@ class MQTTDataPipeline:
             
             print(f"Connecting to target broker: {self.target_broker}")
             self.target_client.connect(self.target_broker, self.target_port)
+            self.target_client.loop_start()
 
             # Start the source client loop
             self.source_client.loop_forever()
@@ -164,9 +263,16 @@ class MQTTDataPipeline:
             sys.exit(1)
 
 if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, signal.default_int_handler)  # Stop on SIGTERM like on Ctrl+C
     # Parse command line arguments
     args = parse_arguments()
     
+    # Soak mode monitor for long unattended runs, only enabled with --soak
+    soak = None
+    if args.soak:
+        soak = SoakMonitor(args.soak, args.soak_interval)
+        soak.start()
+
     # Create and start the pipeline
-    pipeline = MQTTDataPipeline(args.h, args.topic)
+    pipeline = MQTTDataPipeline(args.h, args.topic, args.serve, args.fs, soak, args.serve_host)
     pipeline.start()
\ No newline at end of file
@@ -5,7 +5,11 @@ import random
 import matplotlib.pyplot as plt
 from datetime import datetime
 import argparse
+import signal
 import sys
+from live_view import LiveViewServer
+from soak_monitor import SoakMonitor
+from sequence_verifier import DEVICE_KEY, SEQ_KEY
 
 # Function to parse command-line arguments
 def parse_arguments():
@@ -18,6 +22,20 @@ def parse_arguments():
                         help="Specify the value names for the data, separated by commas (default: value)")
     parser.add_argument('--r', '--range', type=str, default="70,80",
                         help="Specify the range of values for each vital, separated by commas. For multiple vitals, provide ranges like 'min1,max1,min2,max2' (default: 70,80)")
+    parser.add_argument('--i', '--interval', type=float, default=4,
+                        help="Specify the number of seconds to wait between messages (default: 4)")
+    parser.add_argument('--d', '--device', type=str, default=None,
+                        help="Stamp each message with this device id and a sequence number for the verifier (default: disabled)")
+    parser.add_argument('--stats-out', type=str, default=None, metavar='FILE',
+                        help="Write the number of messages sent and failed as JSON to this file on exit")
+    parser.add_argument('--serve', type=int, default=None, metavar='PORT',
+                        help="Serve a live view in the browser on this port instead of opening a Matplotlib window")
+    parser.add_argument('--serve-host', type=str, default="127.0.0.1",
+                        help="Address the live view listens on, use 0.0.0.0 to allow remote viewers (default: 127.0.0.1)")
+    parser.add_argument('--soak', type=str, default=None, metavar='FILE',
+                        help="Soak mode: periodically log memory, allocations, object counts, sockets and per-message CPU time to this file")
+    parser.add_argument('--soak-interval', type=float, default=60,
+                        help="Seconds between soak mode samples (default: 60)")
     return parser.parse_args()
 
 # Function to validate and parse ranges
@@ -45,6 +63,11 @@ args = parse_arguments()
 selected_host = args.h
 selected_topic = args.t
 selected_vitals = args.v.split(',')  # Split value names by comma
+selected_device = args.d
+selected_interval = args.i
+
+# Messages sent and failed, written to --stats-out on exit
+stats = {"device": selected_device, "sent": 0, "failed": 0}
 
 try:
     ranges = parse_ranges(args.r, len(selected_vitals))  # Parse and validate ranges
@@ -57,9 +80,20 @@ print(f"You selected host {selected_host}, topic {selected_topic}, vitals {selec
 # API endpoint
 API_URL = f"http://{selected_host}:5100/add-medical"  # Host and port from command-line argument
 
-# Initialize Matplotlib figure
-plt.ion()  # Enable interactive mode
-fig, ax = plt.subplots()
+# Initialize the live view server, or the Matplotlib figure when not serving
+live_view = None
+if args.serve:
+    live_view = LiveViewServer(args.serve, f"{selected_topic.replace('_', ' ').title()} data published to host {selected_host}", host=args.serve_host)
+    live_view.start()
+else:
+    plt.ion()  # Enable interactive mode
+    fig, ax = plt.subplots()
+
+# Soak mode monitor for long unattended runs, only enabled with --soak
+soak = None
+if args.soak:
+    soak = SoakMonitor(args.soak, args.soak_interval)
+    soak.start()
 timestamps, y_data = [], [[] for _ in selected_vitals]  # Separate lists for each value name
 
 # Maximum number of data points to display
@@ -71,7 +105,10 @@ def send_data():
     """
     global timestamps, y_data  # Declare global variables
 
+    seq = 0  # Per-device sequence number, only stamped when a device id is given
     while True:
+        cpu_start = time.thread_time()
+
         # Generate sensor data based on value names and ranges
         payload = {
             "topic": selected_topic,
@@ -81,6 +118,12 @@ def send_data():
             
         }
 
+        # Stamp device id and sequence number so consumers can verify delivery
+        if selected_device:
+            payload['payload'][DEVICE_KEY] = selected_device
+            payload['payload'][SEQ_KEY] = seq
+            seq += 1
+
         # Generate random values within the specified ranges for each value name
         for i, vital in enumerate(selected_vitals):
             min_val, max_val = ranges[i]
@@ -93,8 +136,14 @@ def send_data():
         try:
             # Send the POST request
             response = requests.post(API_URL, json=payload)
+            if response.ok:
+                stats["sent"] += 1
+            else:
+                stats["failed"] += 1
+                print(f"Error sending data: HTTP {response.status_code}")
         
         except Exception as e:
+            stats["failed"] += 1
             print(f"Error sending data: {e}")
 
         # Update plot data
@@ -107,29 +156,41 @@ def send_data():
                 if len(y_data[i]) > MAX_POINTS:
                     y_data[i].pop(0)
 
-        # Clear the previous plot
-        ax.clear()
+        if live_view:
+            # Viewers draw the chart, only push the new point
+            live_view.push(human_readable_time, {vital: payload['payload'][vital] for vital in selected_vitals})
+        else:
+            # Clear the previous plot
+            ax.clear()
 
-        # Plot the data for each value name
-        for i, vital in enumerate(selected_vitals):
-            ax.plot(timestamps, y_data[i], marker='o', linestyle='-', label=f"{vital}")
+            # Plot the data for each value name
+            for i, vital in enumerate(selected_vitals):
+                ax.plot(timestamps, y_data[i], marker='o', linestyle='-', label=f"{vital}")
+
+            # Set common plot properties
+            ax.set_xlabel("Time")
+            ax.set_ylabel("Value")
+            ax.set_title(f"{selected_topic.replace('_', ' ').title()} data published to host {selected_host}")
+            ax.legend()  # Show legend for multiple lines
+            plt.xticks(rotation=45)  # Rotate x-axis labels for better readability
+            plt.pause(0.5)  # Refresh every 0.5 seconds
 
-        # Set common plot properties
-        ax.set_xlabel("Time")
-        ax.set_ylabel("Value")
-        ax.set_title(f"{selected_topic.replace('_', ' ').title()} data published to host {selected_host}")
-        ax.legend()  # Show legend for multiple lines
-        plt.xticks(rotation=45)  # Rotate x-axis labels for better readability
-        plt.pause(0.5)  # Refresh every 0.5 seconds
+        if soak:
+            soak.record_message(time.thread_time() - cpu_start)
 
         # Wait before sending the next request
-        time.sleep(4)  # Send every 2 seconds
+        time.sleep(selected_interval)
 
 if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, signal.default_int_handler)  # Stop on SIGTERM like on Ctrl+C
     try:
         send_data()
     except KeyboardInterrupt:
         print("Script terminated by user.")
     except Exception as e:
         print(f"Error: {e}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+    finally:
+        if args.stats_out:
+            with open(args.stats_out, "w") as f:
+                json.dump(stats, f)
@@ -4,6 +4,12 @@ import matplotlib.pyplot as plt
 from datetime import datetime
 import json
 import argparse
+import signal
+import math
+from collections import deque
+from live_view import LiveViewServer
+from soak_monitor import SoakMonitor
+from sequence_verifier import SequenceVerifier, DEVICE_KEY, SEQ_KEY
 
 # Function to parse command-line arguments
 def parse_arguments():
@@ -12,6 +18,18 @@ def parse_arguments():
                         help="Specify the API host (default: 129.74.152.201)")
     parser.add_argument('--t', '--topic', type=str, default="heart_rate",
                         help="Specify the topic to query (default: heart_rate)")
+    parser.add_argument('--verify', action='store_true',
+                        help="Track per-device sequence numbers and report loss, duplicates, reordering and gaps")
+    parser.add_argument('--verify-out', type=str, default=None, metavar='FILE',
+                        help="Write the verifier summary as JSON to this file on exit (implies --verify)")
+    parser.add_argument('--serve', type=int, default=None, metavar='PORT',
+                        help="Serve a live view in the browser on this port instead of opening a Matplotlib window")
+    parser.add_argument('--serve-host', type=str, default="127.0.0.1",
+                        help="Address the live view listens on, use 0.0.0.0 to allow remote viewers (default: 127.0.0.1)")
+    parser.add_argument('--soak', type=str, default=None, metavar='FILE',
+                        help="Soak mode: periodically log memory, allocations, object counts, sockets and per-message CPU time to this file")
+    parser.add_argument('--soak-interval', type=float, default=60,
+                        help="Seconds between soak mode samples (default: 60)")
     return parser.parse_args()
 
 # Parse command-line arguments
@@ -21,9 +39,20 @@ selected_topic = args.t
 
 print(f"You selected host {selected_host} and topic {selected_topic}.")
 
+# Verifier for sequence-stamped messages, only enabled with --verify
+verifier = SequenceVerifier() if args.verify or args.verify_out else None
+
+# Seconds of data returned by each query, and seconds between queries
+QUERY_WINDOW = 5
+POLL_INTERVAL = 2
+
 # API endpoint and payload
 API_URL = f"http://{selected_host}:5100/get-medical"  # Host and port from command-line argument
-PAYLOAD = {"time": "5 secs","topic": selected_topic}  # Dynamic payload based on the selected topic
+PAYLOAD = {"time": f"{QUERY_WINDOW} secs","topic": selected_topic}  # Dynamic payload based on the selected topic
+
+# (device, seq) pairs returned by the last few polls. Query windows overlap,
+# so an entry is returned by several polls but must be verified only once.
+recent_entries = deque(maxlen=math.ceil(QUERY_WINDOW / POLL_INTERVAL) + 1)
 
 # Lists to store timestamps and values
 timestamps = []
@@ -35,9 +64,20 @@ last_plotted_timestamp = None
 # Get the initial timestamp when the script starts
 initial_timestamp = time.time()
 
-# Initialize Matplotlib figure
-plt.ion()
-fig, ax = plt.subplots()
+# Initialize the live view server, or the Matplotlib figure when not serving
+live_view = None
+if args.serve:
+    live_view = LiveViewServer(args.serve, f"Data queried from host {selected_host} for topic: {selected_topic}", host=args.serve_host)
+    live_view.start()
+else:
+    plt.ion()
+    fig, ax = plt.subplots()
+
+# Soak mode monitor for long unattended runs, only enabled with --soak
+soak = None
+if args.soak:
+    soak = SoakMonitor(args.soak, args.soak_interval)
+    soak.start()
 
 # Maximum number of data points to display
 MAX_POINTS = 20  # You can adjust this value as needed
@@ -86,6 +126,27 @@ def normalize_timestamp(timestamp_value):
         print(f"Error normalizing timestamp {timestamp_value}: {e}")
         return None
 
+def verify_entries(entries):
+    """
+    Feeds every entry newer than the script start to the verifier, skipping
+    entries already returned by an earlier, overlapping poll.
+    """
+    earlier = set().union(*recent_entries)
+    current = set()
+    for entry in entries:
+        if SEQ_KEY not in entry or "timestamp" not in entry:
+            continue
+        normalized_timestamp = normalize_timestamp(entry["timestamp"])
+        if normalized_timestamp is None or normalized_timestamp < initial_timestamp:
+            continue
+        key = (entry.get(DEVICE_KEY), entry[SEQ_KEY])
+        current.add(key)
+        # Only earlier polls are checked, so repeats within one response
+        # still count as duplicates
+        if key not in earlier:
+            verifier.record(entry, latency=time.time() - normalized_timestamp)
+    recent_entries.append(current)
+
 def fetch_data():
     """
     Fetches data from the API and updates the timestamps and values lists.
@@ -99,6 +160,8 @@ def fetch_data():
             if outer_data == "Data does not exists!!":
                 return
             if isinstance(outer_data, dict) and "data" in outer_data:
+                if verifier:
+                    verify_entries(outer_data["data"])
                 for entry in outer_data["data"]:
                     if "timestamp" in entry:
                         # Convert timestamp using the new normalize_timestamp function
@@ -112,12 +175,17 @@ def fetch_data():
                             timestamp_str = datetime.fromtimestamp(normalized_timestamp).strftime("%H:%M:%S")
                             timestamps.append(timestamp_str)
                             
-                            # Iterate over all keys in the entry (except "timestamp")
+                            # Iterate over all keys in the entry (except "timestamp" and verifier stamps)
+                            new_values = {}
                             for key, value in entry.items():
-                                if key != "timestamp" and value is not None:
+                                if key not in ("timestamp", DEVICE_KEY, SEQ_KEY) and value is not None:
                                     if key not in data_values:
                                         data_values[key] = []
                                     data_values[key].append(float(value))
+                                    new_values[key] = data_values[key][-1]
+
+                            if live_view:
+                                live_view.push(timestamp_str, new_values)
                             
                             last_plotted_timestamp = normalized_timestamp
 
@@ -158,11 +226,23 @@ def main():
     """
     try:
         while True:
+            cpu_start = time.thread_time()
             fetch_data()
-            update_plot()
-            time.sleep(2)  # Wait for 2 seconds before the next request
+            if not live_view:
+                update_plot()
+            if soak:
+                soak.record_message(time.thread_time() - cpu_start)
+            if verifier:
+                verifier.maybe_report()
+            time.sleep(POLL_INTERVAL)  # Wait before the next request
     except KeyboardInterrupt:
         print("Script stopped by user.")
+    finally:
+        if verifier:
+            print(verifier.report())
+            if args.verify_out:
+                verifier.save(args.verify_out)
 
 if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, signal.default_int_handler)  # Stop on SIGTERM like on Ctrl+C
     main()
\ No newline at end of file
@@ -0,0 +1,202 @@
+import json
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAGE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "live_view.html")
+
+# Frames buffered per viewer before it is considered too slow and dropped.
+# The browser reconnects on its own and starts again from a fresh snapshot.
+CLIENT_QUEUE_SIZE = 64
+
+# Interval between keep-alive comments sent to idle viewers
+KEEPALIVE_INTERVAL = 15
+
+
+def finite_or_none(value):
+    """
+    Maps NaN and infinity to None, since JSON.parse in the browser rejects them.
+    """
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class LiveViewHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass  # Keep the ingesting script's console output clean
+
+    def do_GET(self):
+        if self.path == "/":
+            self.send_page()
+        elif self.path == "/events":
+            self.send_events()
+        else:
+            self.send_error(404)
+
+    def send_page(self):
+        with open(PAGE_PATH, "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self):
+        live_view = self.server.live_view
+        client, snapshot = live_view.add_client()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(snapshot)
+            self.wfile.flush()
+            while True:
+                try:
+                    frame = client.get(timeout=KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    frame = b": keep-alive\n\n"
+                if frame is None:
+                    break  # Dropped by the broadcaster
+                self.wfile.write(frame)
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Viewer closed the page
+        finally:
+            live_view.remove_client(client)
+
+
+class LiveViewServer:
+    """
+    Serves a browser page that draws the charts and streams new data points
+    to it over server-sent events.
+
+    The ingesting script only calls push(); batching, encoding and fan-out to
+    viewers happen on background threads at a capped frame rate.
+
+    The page has no authentication, so it only listens on localhost unless
+    another host address is given.
+    """
+
+    def __init__(self, port, title, max_points=20, max_fps=2, host="127.0.0.1"):
+        self.title = title
+        self.max_points = max_points
+        self.frame_interval = 1.0 / max_fps
+
+        self.lock = threading.Lock()
+        self.pending = []  # Points pushed since the last frame
+        self.history = deque(maxlen=max_points)  # Snapshot for new viewers
+        self.pending_waveforms = {}  # Newest waveform chunk per field since the last frame
+        self.waveforms = {}  # Newest waveform chunk per field, for new viewers
+        self.clients = set()
+
+        self.httpd = ThreadingHTTPServer((host, port), LiveViewHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.live_view = self
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        threading.Thread(target=self.broadcast_loop, daemon=True).start()
+        host, port = self.httpd.server_address[:2]
+        print(f"Live view available at http://{host}:{port}/")
+
+    def push(self, timestamp, values):
+        """
+        Queues a data point for the viewers.
+        timestamp is the x-axis label, values maps each series name to a number.
+        """
+        point = (timestamp, values)
+        with self.lock:
+            self.pending.append(point)
+            self.history.append(point)
+
+    def push_waveform(self, name, start_time, sample_rate, samples):
+        """
+        Queues the newest chunk of a waveform field for the viewers.
+        start_time is the time of the first sample in seconds. samples is
+        kept as is and only converted when the frame is encoded.
+        Older chunks not yet sent are replaced.
+        """
+        chunk = (start_time, sample_rate, samples)
+        with self.lock:
+            self.pending_waveforms[name] = chunk
+            self.waveforms[name] = chunk
+
+    def add_client(self):
+        """
+        Registers a viewer. Returns its frame queue and the snapshot frame to
+        send before anything from the queue.
+        """
+        client = queue.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        with self.lock:
+            # Points still pending go out with the next delta, so leave them
+            # out of the snapshot to avoid sending them twice
+            points = list(self.history)[:max(0, len(self.history) - len(self.pending))]
+            waveforms = dict(self.waveforms)
+            self.clients.add(client)
+
+        # Encode outside the lock so a new viewer doesn't hold up push()
+        return client, self.encode_frame(points, waveforms, reset=True)
+
+    def remove_client(self, client):
+        with self.lock:
+            self.clients.discard(client)
+
+    def encode_frame(self, points, waveforms=None, reset=False):
+        """
+        Encodes points as one SSE event holding only the new samples,
+        with each series aligned to the timestamps (null where missing).
+        Waveform chunks go in a separate "w" entry.
+        """
+        series = {}
+        for i, (_, values) in enumerate(points):
+            for key, value in values.items():
+                if key not in series:
+                    series[key] = [None] * i
+                series[key].append(finite_or_none(value))
+            for key in series:
+                if len(series[key]) <= i:
+                    series[key].append(None)
+
+        frame = {"t": [timestamp for timestamp, _ in points], "v": series}
+        if waveforms:
+            frame["w"] = {
+                name: {"t0": start_time, "fs": sample_rate,
+                       "v": [finite_or_none(value) for value in samples.tolist()]}
+                for name, (start_time, sample_rate, samples) in waveforms.items()
+            }
+        if reset:
+            frame["reset"] = True
+            frame["title"] = self.title
+            frame["max_points"] = self.max_points
+        return f"data: {json.dumps(frame, separators=(',', ':'), allow_nan=False)}\n\n".encode("utf-8")
+
+    def broadcast_loop(self):
+        while True:
+            time.sleep(self.frame_interval)
+            with self.lock:
+                if not self.pending and not self.pending_waveforms:
+                    continue
+                # Viewers only keep the last max_points, older ones would be dropped anyway
+                points, self.pending = self.pending[-self.max_points:], []
+                waveforms, self.pending_waveforms = self.pending_waveforms, {}
+                clients = list(self.clients)
+
+            frame = self.encode_frame(points, waveforms)
+            for client in clients:
+                try:
+                    client.put_nowait(frame)
+                except queue.Full:
+                    # Too slow to keep up, disconnect so it resyncs from a snapshot
+                    self.remove_client(client)
+                    try:
+                        client.get_nowait()
+                        client.put_nowait(None)
+                    except (queue.Empty, queue.Full):
+                        pass
@@ -1,8 +1,13 @@
 import paho.mqtt.client as mqtt
 import json
+import time
 import matplotlib.pyplot as plt
 from datetime import datetime
 import argparse
+import signal
+from live_view import LiveViewServer
+from soak_monitor import SoakMonitor
+from sequence_verifier import SequenceVerifier, DEVICE_KEY, SEQ_KEY
 
 # Function to parse command-line arguments
 def parse_arguments():
@@ -11,6 +16,18 @@ def parse_arguments():
                         help="Specify the MQTT broker host (default: 75.131.29.55)")
     parser.add_argument('--t', '--topic', type=str, default="heart_rate",
                         help="Specify the MQTT topic to subscribe to (default: heart_rate)")
+    parser.add_argument('--verify', action='store_true',
+                        help="Track per-device sequence numbers and report loss, duplicates, reordering and gaps")
+    parser.add_argument('--verify-out', type=str, default=None, metavar='FILE',
+                        help="Write the verifier summary as JSON to this file on exit (implies --verify)")
+    parser.add_argument('--serve', type=int, default=None, metavar='PORT',
+                        help="Serve a live view in the browser on this port instead of opening a Matplotlib window")
+    parser.add_argument('--serve-host', type=str, default="127.0.0.1",
+                        help="Address the live view listens on, use 0.0.0.0 to allow remote viewers (default: 127.0.0.1)")
+    parser.add_argument('--soak', type=str, default=None, metavar='FILE',
+                        help="Soak mode: periodically log memory, allocations, object counts, sockets and per-message CPU time to this file")
+    parser.add_argument('--soak-interval', type=float, default=60,
+                        help="Seconds between soak mode samples (default: 60)")
     return parser.parse_args()
 
 def parse_message(payload):
@@ -67,13 +84,27 @@ selected_topic = args.t
 
 print(f"You selected host {selected_host} and topic {selected_topic}.")
 
+# Verifier for sequence-stamped messages, only enabled with --verify
+verifier = SequenceVerifier() if args.verify or args.verify_out else None
+
 # MQTT Broker Settings
 BROKER = selected_host
 PORT = 1883
 
-# Initialize Matplotlib figure
-plt.ion()
-fig, ax = plt.subplots()
+# Initialize the live view server, or the Matplotlib figure when not serving
+live_view = None
+if args.serve:
+    live_view = LiveViewServer(args.serve, f"Data received from host {selected_host} for topic: {selected_topic}", host=args.serve_host)
+    live_view.start()
+else:
+    plt.ion()
+    fig, ax = plt.subplots()
+
+# Soak mode monitor for long unattended runs, only enabled with --soak
+soak = None
+if args.soak:
+    soak = SoakMonitor(args.soak, args.soak_interval)
+    soak.start()
 timestamps, y_data = [], []  # Lists to store timestamps and sensor values
 data_labels = []  # List to store labels for the data being plotted
 
@@ -99,25 +130,33 @@ def on_message(client, userdata, msg):
         # Convert timestamp to float if it's a string
         if isinstance(timestamp, str):
             timestamp = float(timestamp)
-        human_readable_time = datetime.fromtimestamp(timestamp/1000 if timestamp > 1e12 else timestamp).strftime("%H:%M:%S")
+        timestamp = timestamp/1000 if timestamp > 1e12 else timestamp
+        human_readable_time = datetime.fromtimestamp(timestamp).strftime("%H:%M:%S")
     except Exception as e:
         print(f"Error converting timestamp: {e}")
         return
+
+    if verifier:
+        verifier.record(data, latency=time.time() - timestamp)
+        verifier.maybe_report()
     
     # Append new timestamp
     timestamps.append(human_readable_time)
     
     # Extract data values based on the structure of the payload
+    new_values = {}  # Values of this message by label, for the live view
     if "value" in data:  # Single value format
         y_data.append([data["value"]])
+        new_values["value"] = data["value"]
         if not data_labels:
             data_labels.append("value")
     else:  # Multiple values format
         values = []
         for key, value in data.items():
-            if key not in ["type", "timestamp"]:  # Skip metadata fields
+            if key not in ["type", "timestamp", DEVICE_KEY, SEQ_KEY]:  # Skip metadata fields
                 if isinstance(value, (int, float)):  # Only plot numeric values
                     values.append(value)
+                    new_values[key] = value
                     if key not in data_labels:
                         data_labels.append(key)
         if values:  # Only append if we have numeric values
@@ -127,6 +166,11 @@ def on_message(client, userdata, msg):
     if len(timestamps) > MAX_POINTS:
         timestamps.pop(0)
         y_data.pop(0)
+
+    if live_view:
+        # Viewers draw the chart, only push the new point
+        live_view.push(human_readable_time, new_values)
+        return
     
     # Clear and update plot
     ax.clear()
@@ -156,13 +200,21 @@ def on_connect(client, userdata, flags, rc):
         print("Failed to connect, return code:", rc)
 
 if __name__ == "__main__":
+    signal.signal(signal.SIGTERM, signal.default_int_handler)  # Stop on SIGTERM like on Ctrl+C
     client = mqtt.Client()
     client.on_connect = on_connect
-    client.on_message = on_message
+    client.on_message = soak.wrap(on_message) if soak else on_message
     
     try:
         client.connect(BROKER, PORT, 60)
         print(f"Starting MQTT subscriber for topic: {selected_topic}")
         client.loop_forever()  # Keep listening for messages
+    except KeyboardInterrupt:
+        print("Script stopped by user.")
     except Exception as e:
-        print(f"Error: {e}")
\ No newline at end of file
+        print(f"Error: {e}")
+    finally:
+        if verifier:
+            print(verifier.report())
+            if args.verify_out:
+                verifier.save(args.verify_out)
\ No newline at end of file
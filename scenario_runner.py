@@ -0,0 +1,353 @@
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Scripts that can be used as components, with the command-line flag for each
+# option accepted in the scenario file
+SOAK_OPTIONS = {"soak": "--soak", "soak_interval": "--soak-interval"}
+PUBLISHER_OPTIONS = {"host": "--h", "topic": "--t", "vitals": "--v", "range": "--r",
+                     "interval": "--i", "device": "--d", **SOAK_OPTIONS}
+CONSUMER_OPTIONS = {"host": "--h", "topic": "--t", **SOAK_OPTIONS}
+SCRIPTS = {
+    "http_publisher": ("publisher", PUBLISHER_OPTIONS),
+    "mqtt_publisher": ("publisher", PUBLISHER_OPTIONS),
+    "http_querier": ("consumer", CONSUMER_OPTIONS),
+    "mqtt_subscriber": ("consumer", CONSUMER_OPTIONS),
+    "bed_dot": ("bridge", {"host": "--h", "topic": "--topic", "sample_rate": "--fs", **SOAK_OPTIONS}),
+}
+
+# Publishers whose messages each consumer receives, following the README's
+# test combinations
+CONSUMES = {
+    "http_querier": {"http_publisher", "mqtt_publisher"},
+    "mqtt_subscriber": {"mqtt_publisher"},
+}
+
+# Topic the scripts use when none is given
+DEFAULT_TOPIC = "heart_rate"
+
+# Seconds a component gets to exit after SIGTERM before it is killed
+STOP_TIMEOUT = 10
+
+# Function to parse command-line arguments
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Run publisher and consumer scenarios and report throughput, latency and resource use.")
+    parser.add_argument('scenarios', type=str,
+                        help="Specify the JSON scenario file")
+    parser.add_argument('--j', '--jobs', type=int, default=1,
+                        help="Specify the number of scenarios to run in parallel (default: 1)")
+    parser.add_argument('--o', '--out', type=str, default=None,
+                        help="Specify a file to write the full report to as JSON (default: none)")
+    parser.add_argument('--log-dir', type=str, default=None,
+                        help="Specify the directory for component logs (default: a new temporary directory)")
+    return parser.parse_args()
+
+def load_scenarios(path):
+    """
+    Loads and validates the scenario file.
+    """
+    with open(path) as f:
+        config = json.load(f)
+
+    scenarios = config.get("scenarios") if isinstance(config, dict) else None
+    if not scenarios:
+        raise ValueError("Scenario file must contain a non-empty 'scenarios' list.")
+
+    names = set()
+    devices = set()
+    for scenario in scenarios:
+        name = scenario.get("name")
+        if not name or name in names:
+            raise ValueError(f"Every scenario needs a unique name, got {name!r}.")
+        names.add(name)
+        if not isinstance(scenario.get("duration"), (int, float)) or scenario["duration"] <= 0:
+            raise ValueError(f"Scenario {name}: 'duration' must be a positive number of seconds.")
+        if not scenario.get("components"):
+            raise ValueError(f"Scenario {name}: 'components' must be a non-empty list.")
+        for component in scenario["components"]:
+            script = component.get("script")
+            if script not in SCRIPTS:
+                raise ValueError(f"Scenario {name}: unknown script {script!r}, expected one of {', '.join(SCRIPTS)}.")
+            unknown = set(component) - set(SCRIPTS[script][1]) - {"script"}
+            if unknown:
+                raise ValueError(f"Scenario {name}: unsupported options for {script}: {', '.join(sorted(unknown))}.")
+
+        # Consumers only count their own scenario's devices, so a device id
+        # must not be published by two components
+        for index, component in enumerate(scenario["components"]):
+            if SCRIPTS[component["script"]][0] == "publisher":
+                device = str(component.get("device", f"{name}-{index}"))
+                if device in devices:
+                    raise ValueError(f"Scenario {name}: device {device!r} is published by more than one component.")
+                devices.add(device)
+
+    return scenarios
+
+def build_command(scenario, index, component, log_dir):
+    """
+    Builds the command line for a component.
+    Returns the command, the verifier summary file for consumers and the
+    send statistics file for publishers.
+    """
+    script = component["script"]
+    role, options = SCRIPTS[script]
+    values = dict(component)
+
+    # Publishers always stamp sequence numbers so the consumers can verify them
+    if role == "publisher":
+        values.setdefault("device", f"{scenario['name']}-{index}")
+
+    cmd = [sys.executable, os.path.join(SCRIPT_DIR, f"{script}.py")]
+    for key, flag in options.items():
+        if key in values:
+            cmd += [flag, str(values[key])]
+
+    verify_out = stats_out = None
+    if role == "consumer":
+        verify_out = os.path.join(log_dir, f"{scenario['name']}-{index}-{script}.verify.json")
+        cmd += ["--verify-out", verify_out]
+    elif role == "publisher":
+        stats_out = os.path.join(log_dir, f"{scenario['name']}-{index}-{script}.stats.json")
+        cmd += ["--stats-out", stats_out]
+    return cmd, verify_out, stats_out
+
+def reap(component, block=False):
+    """
+    Collects the exit status and resource usage of a component's process.
+    Returns False if it is still running and block is not set.
+
+    The process is reaped with os.wait4 instead of Popen.wait/poll, which
+    would discard the per-process resource usage.
+    """
+    if "rusage" in component:
+        return True
+    proc = component["proc"]
+    pid, status, rusage = os.wait4(proc.pid, 0 if block else os.WNOHANG)
+    if not pid:
+        return False
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    component["stopped"] = time.time()
+    component["rusage"] = rusage
+    return True
+
+def stop(components):
+    """
+    Stops the components with SIGTERM, which the scripts handle like Ctrl+C,
+    killing any that don't exit within STOP_TIMEOUT seconds.
+
+    SIGINT is not used since a child inherits it as ignored when the runner
+    is started in the background from a non-interactive shell.
+    """
+    for component in components:
+        if not reap(component):
+            component["proc"].send_signal(signal.SIGTERM)
+
+    deadline = time.time() + STOP_TIMEOUT
+    for component in components:
+        while not reap(component):
+            if time.time() >= deadline:
+                component["proc"].kill()
+                reap(component, block=True)
+                break
+            time.sleep(0.1)
+
+def run_scenario(scenario, log_dir):
+    """
+    Runs all components of a scenario concurrently and collects their results.
+    """
+    name = scenario["name"]
+    print(f"Starting scenario {name} ({scenario['duration']}s)")
+
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    if not scenario.get("plot", False):
+        env["MPLBACKEND"] = "Agg"  # Plot off-screen, no windows
+
+    components = []
+    for index, component in enumerate(scenario["components"]):
+        cmd, verify_out, stats_out = build_command(scenario, index, component, log_dir)
+        components.append({
+            "index": index,
+            "script": component["script"],
+            "role": SCRIPTS[component["script"]][0],
+            "topic": component.get("topic", DEFAULT_TOPIC),
+            "device": str(component.get("device", f"{name}-{index}")),
+            "command": cmd,
+            "verify_out": verify_out,
+            "stats_out": stats_out,
+            "log": os.path.join(log_dir, f"{name}-{index}-{component['script']}.log"),
+        })
+
+    publishers = [c for c in components if c["role"] == "publisher"]
+    others = [c for c in components if c["role"] != "publisher"]
+
+    # Devices each consumer should receive. Parallel scenarios may share a
+    # topic, so anything else it sees belongs to another scenario.
+    for component in others:
+        if component["role"] == "consumer":
+            component["devices"] = {p["device"] for p in publishers
+                                    if p["script"] in CONSUMES[component["script"]]
+                                    and p["topic"] == component["topic"]}
+
+    def start(group):
+        for component in group:
+            with open(component["log"], "w") as log:
+                component["proc"] = subprocess.Popen(component["command"], stdout=log,
+                                                     stderr=subprocess.STDOUT, env=env)
+            component["started"] = time.time()
+
+    # Consumers first, so they are subscribed before anything is published
+    start(others)
+    time.sleep(scenario.get("warmup", 2))
+    start(publishers)
+    time.sleep(scenario["duration"])
+
+    # Note components that died on their own before being stopped
+    for component in components:
+        component["exited_early"] = reap(component)
+
+    # Stop publishers first and give consumers time to receive what is in flight
+    stop(publishers)
+    time.sleep(scenario.get("drain", 5))
+    stop(others)
+
+    results = [component_result(component, scenario["duration"]) for component in components]
+    add_publisher_loss(results)
+    print(f"Finished scenario {name}")
+    return {"name": name, "duration": scenario["duration"], "components": results}
+
+def component_result(component, duration):
+    rusage = component["rusage"]
+    wall = component["stopped"] - component["started"]
+    cpu = rusage.ru_utime + rusage.ru_stime
+    result = {
+        "script": component["script"],
+        "role": component["role"],
+        "topic": component["topic"],
+        "command": component["command"],
+        "log": component["log"],
+        "exit_code": component["proc"].returncode,
+        "exited_early": component["exited_early"],
+        "cpu_seconds": cpu,
+        "cpu_percent": 100.0 * cpu / wall if wall > 0 else 0.0,
+        "max_rss_mb": rusage.ru_maxrss / 1024,  # ru_maxrss is in KB on Linux
+        "failed": component["exited_early"],
+    }
+
+    if component["stats_out"]:
+        try:
+            with open(component["stats_out"]) as f:
+                stats = json.load(f)
+        except (OSError, ValueError):
+            stats = {}
+        published = stats.get("sent")
+        result.update({
+            "device": component["device"],
+            "published": published,
+            "send_failures": stats.get("failed"),
+            "throughput": published / duration if published is not None else None,
+            # A publisher that sent nothing failed, whatever its exit code
+            "failed": component["exited_early"] or not published,
+        })
+
+    if component["verify_out"]:
+        try:
+            with open(component["verify_out"]) as f:
+                devices = json.load(f)
+        except (OSError, ValueError):
+            devices = {}
+        devices = {device: d for device, d in devices.items() if device in component["devices"]}
+        received = sum(d["received"] for d in devices.values())
+        latencies = [(d["latency_mean"], d["received"]) for d in devices.values() if d.get("latency_mean") is not None]
+        result.update({
+            "devices": devices,
+            "received": received,
+            "throughput": received / duration,
+            "lost": sum(d["lost"] for d in devices.values()),
+            "duplicates": sum(d["duplicates"] for d in devices.values()),
+            "latency_mean": (sum(m * n for m, n in latencies) / sum(n for _, n in latencies)) if latencies else None,
+            "latency_max": max((d["latency_max"] for d in devices.values() if d.get("latency_max") is not None), default=None),
+        })
+    return result
+
+def add_publisher_loss(results):
+    """
+    Computes loss from the number of messages each publisher actually sent,
+    so messages lost at the tail, or a publisher never seen at all, count
+    too. The verifier alone only sees gaps up to the last message received.
+
+    A publisher's loss is the worst loss among the consumers receiving it.
+    Consumer results only hold devices of their own scenario's publishers.
+    """
+    for consumer in results:
+        if consumer["role"] != "consumer":
+            continue
+        devices = consumer["devices"]
+        publishers = [p for p in results
+                      if p["script"] in CONSUMES[consumer["script"]]
+                      and p["topic"] == consumer["topic"]
+                      and p.get("published") is not None]
+        counted = {p["device"] for p in publishers}
+
+        # Devices without publisher counts keep the verifier's figure
+        lost = sum(d["lost"] for device, d in devices.items() if device not in counted)
+        for publisher in publishers:
+            device_lost = max(publisher["published"] - devices.get(publisher["device"], {}).get("unique", 0), 0)
+            publisher["lost"] = max(publisher.get("lost", 0), device_lost)
+            lost += device_lost
+        consumer["lost"] = lost
+
+def format_value(value, fmt):
+    return "-" if value is None else format(value, fmt)
+
+def print_report(results):
+    for scenario in results:
+        print(f"\nScenario: {scenario['name']} ({scenario['duration']}s)")
+        print(f"  {'component':<22}{'exit':>6}{'cpu s':>9}{'cpu %':>8}{'rss MB':>9}"
+              f"{'msgs':>8}{'msg/s':>8}{'err':>6}{'lost':>7}{'dup':>6}{'lat mean':>10}{'lat max':>9}")
+        for c in scenario["components"]:
+            label = f"{c['script']}"
+            exit_code = f"{c['exit_code']}{'!' if c['failed'] else ''}"
+            msgs = c.get("received", c.get("published"))
+            print(f"  {label:<22}{exit_code:>6}{c['cpu_seconds']:>9.2f}{c['cpu_percent']:>8.1f}"
+                  f"{c['max_rss_mb']:>9.1f}{format_value(msgs, 'd'):>8}"
+                  f"{format_value(c.get('throughput'), '.2f'):>8}{format_value(c.get('send_failures'), 'd'):>6}"
+                  f"{format_value(c.get('lost'), 'd'):>7}"
+                  f"{format_value(c.get('duplicates'), 'd'):>6}{format_value(c.get('latency_mean'), '.3f'):>10}"
+                  f"{format_value(c.get('latency_max'), '.3f'):>9}")
+    print("\n'!' marks components that exited before the scenario ended, or publishers that sent nothing. See their logs.")
+
+def main():
+    args = parse_arguments()
+    try:
+        scenarios = load_scenarios(args.scenarios)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    log_dir = args.log_dir or tempfile.mkdtemp(prefix="web3db-scenarios-")
+    os.makedirs(log_dir, exist_ok=True)
+    print(f"Running {len(scenarios)} scenarios, {args.j} at a time. Logs in {log_dir}")
+
+    with ThreadPoolExecutor(max_workers=args.j) as pool:
+        results = list(pool.map(lambda scenario: run_scenario(scenario, log_dir), scenarios))
+
+    print_report(results)
+    if args.o:
+        with open(args.o, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Report written to {args.o}")
+
+    # Fail the batch if any component crashed or a publisher sent nothing
+    if any(c["failed"] for scenario in results for c in scenario["components"]):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
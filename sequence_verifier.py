@@ -0,0 +1,284 @@
+import json
+import time
+
+# Payload keys stamped by the publishers when a device id is given
+DEVICE_KEY = "device_id"
+SEQ_KEY = "seq"
+
+# Maximum number of gaps printed per device in a report
+MAX_REPORTED_GAPS = 10
+
+# How far behind the highest sequence number a message can arrive and still
+# be recognized as reordered or duplicate rather than lost
+REORDER_HORIZON = 10000
+
+
+class SequenceWindow:
+    """
+    Compact record of the sequence numbers received from one device.
+
+    At most the last 2 * horizon sequence numbers are kept exactly, as one byte
+    per number. Everything below that watermark is collapsed into counters
+    and the first MAX_REPORTED_GAPS gaps, so memory stays bounded no matter
+    how many messages are received.
+
+    The watermark always stays at least horizon below the highest number, so
+    numbers at or above first - horizon still count as reordered. A number
+    arriving below the watermark can no longer be told apart from a
+    duplicate and is not counted as received.
+    """
+
+    def __init__(self, first, horizon):
+        self.horizon = horizon
+        self.first = first  # Lowest sequence number received
+        self.base = max(0, first - horizon)  # Lowest sequence number still tracked exactly
+        self.window = bytearray()  # window[i] is 1 if base + i was received
+
+        # Settled state below base
+        self.settled_received = 0
+        self.settled_gaps = 0
+        self.first_gaps = []
+        self.gap_start = None  # Start of a gap still open at base
+
+    def add(self, value):
+        """
+        Adds a value. Returns True if it is new, False if it is a duplicate
+        and None if it is below the watermark.
+        """
+        if value < self.base:
+            return None
+
+        # Settle old numbers in chunks of at least horizon, so each number
+        # is settled once and the window stays under 2 * horizon bytes
+        if value - self.base >= 2 * self.horizon:
+            self.settle(value - self.horizon)
+
+        i = value - self.base
+        if i >= len(self.window):
+            self.window.extend(bytes(i + 1 - len(self.window)))
+        elif self.window[i]:
+            return False
+        self.window[i] = 1
+        self.first = min(self.first, value)
+        return True
+
+    def add_gap(self, start, end):
+        self.settled_gaps += 1
+        if len(self.first_gaps) < MAX_REPORTED_GAPS:
+            self.first_gaps.append((start, end))
+
+    def settle(self, new_base):
+        """
+        Collapses everything below new_base into the counters.
+        """
+        n = new_base - self.base
+        chunk = self.window[:n]
+        del self.window[:n]
+        self.settled_received += chunk.count(1)
+        self.scan_gaps(chunk, self.base, self.add_gap)
+
+        # Numbers past the end of the window were never received
+        if len(chunk) < n and self.gap_start is None:
+            self.gap_start = self.base + len(chunk)
+        self.base = new_base
+
+    def scan_gaps(self, chunk, offset, on_gap):
+        """
+        Calls on_gap(start, end) for every gap in chunk that closes inside it,
+        continuing the open gap from the previous chunk. Numbers below first
+        were never expected and are not part of a gap.
+        """
+        pos = 0
+        while pos < len(chunk):
+            if self.gap_start is None:
+                i = chunk.find(0, pos)
+                if i < 0:
+                    return
+                self.gap_start = offset + i
+                pos = i
+            j = chunk.find(1, pos)
+            if j < 0:
+                return
+            if offset + j > self.first:
+                on_gap(max(self.gap_start, self.first), offset + j - 1)
+            self.gap_start = None
+            pos = j
+
+    def count(self):
+        """
+        Returns the number of unique values received.
+        """
+        return self.settled_received + self.window.count(1)
+
+    def gaps(self):
+        """
+        Returns the total number of gaps and the first MAX_REPORTED_GAPS of
+        them as (start, end) inclusive ranges.
+        """
+        count = self.settled_gaps
+        first = list(self.first_gaps)
+
+        def on_gap(start, end):
+            nonlocal count
+            count += 1
+            if len(first) < MAX_REPORTED_GAPS:
+                first.append((start, end))
+
+        # Scan the window without changing the settled state
+        gap_start = self.gap_start
+        self.scan_gaps(self.window, self.base, on_gap)
+        self.gap_start = gap_start
+        return count, first
+
+
+class DeviceStats:
+    """
+    Tracks the sequence numbers received from a single device.
+    """
+
+    def __init__(self, horizon):
+        self.horizon = horizon
+        self.received = None  # SequenceWindow, created on the first message
+        self.total = 0
+        self.duplicates = 0
+        self.reordered = 0
+        self.late = 0
+        self.max_reorder_depth = 0
+        self.highest = None
+        self.latency_count = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def record(self, seq, latency=None):
+        self.total += 1
+        if latency is not None:
+            self.latency_count += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+
+        if self.received is None:
+            self.received = SequenceWindow(seq, self.horizon)
+        added = self.received.add(seq)
+        if added is False:
+            self.duplicates += 1
+            return
+
+        if self.highest is None or seq > self.highest:
+            self.highest = seq
+        else:
+            # Arrived after a later sequence number was already seen
+            self.reordered += 1
+            self.max_reorder_depth = max(self.max_reorder_depth, self.highest - seq)
+            if added is None:
+                self.late += 1
+
+    def summary(self):
+        """
+        Returns a dictionary with loss, duplicate, reordering and gap figures.
+        """
+        if self.received is None:
+            return {"received": 0, "unique": 0, "lost": 0, "duplicates": 0,
+                    "reordered": 0, "late": 0, "max_reorder_depth": 0,
+                    "gap_count": 0, "gaps": []}
+
+        unique = self.received.count()
+        expected = self.highest - self.received.first + 1
+        gap_count, gaps = self.received.gaps()
+        latency_mean = self.latency_total / self.latency_count if self.latency_count else None
+        return {
+            "received": self.total,
+            "unique": unique,
+            "first_seq": self.received.first,
+            "last_seq": self.highest,
+            "lost": expected - unique,
+            "duplicates": self.duplicates,
+            "reordered": self.reordered,
+            "late": self.late,
+            "max_reorder_depth": self.max_reorder_depth,
+            "latency_mean": latency_mean,
+            "latency_max": self.latency_max if self.latency_count else None,
+            "gap_count": gap_count,
+            "gaps": gaps,
+        }
+
+
+class SequenceVerifier:
+    """
+    Verifies end-to-end delivery of sequence-stamped messages per device.
+    """
+
+    def __init__(self, report_interval=30, horizon=REORDER_HORIZON):
+        self.devices = {}
+        self.horizon = horizon
+        self.report_interval = report_interval
+        self.last_report = time.time()
+
+    def record(self, data, latency=None):
+        """
+        Records the sequence number of a parsed message, and optionally its
+        delivery latency in seconds. Returns False if the message carries no
+        sequence number.
+        """
+        seq = data.get(SEQ_KEY)
+        if seq is None:
+            return False
+        try:
+            seq = int(seq)
+        except (TypeError, ValueError):
+            print(f"Error: Invalid sequence number {seq!r}")
+            return False
+
+        device = str(data.get(DEVICE_KEY, "unknown"))
+        if device not in self.devices:
+            self.devices[device] = DeviceStats(self.horizon)
+        self.devices[device].record(seq, latency)
+        return True
+
+    def summary(self):
+        return {device: stats.summary() for device, stats in self.devices.items()}
+
+    def report(self):
+        """
+        Returns a human-readable report for all tracked devices.
+        """
+        if not self.devices:
+            return "Verifier: no sequence-stamped messages received."
+
+        lines = ["Verifier report:"]
+        for device, summary in sorted(self.summary().items()):
+            if summary["received"] == 0:
+                continue
+            expected = summary["unique"] + summary["lost"]
+            loss_pct = 100.0 * summary["lost"] / expected
+            lines.append(
+                f"  {device}: seq {summary['first_seq']}-{summary['last_seq']}, "
+                f"received {summary['received']}, lost {summary['lost']} ({loss_pct:.2f}%), "
+                f"duplicates {summary['duplicates']}, reordered {summary['reordered']} "
+                f"(max depth {summary['max_reorder_depth']})"
+            )
+            if summary["late"]:
+                lines.append(f"    late: {summary['late']} arrived more than {self.horizon} behind the highest and are not counted as received")
+            if summary["latency_mean"] is not None:
+                lines.append(f"    latency: mean {summary['latency_mean']:.3f}s, max {summary['latency_max']:.3f}s")
+            gaps = summary["gaps"]
+            if gaps:
+                shown = ", ".join(f"{start}" if start == end else f"{start}-{end}" for start, end in gaps)
+                more = summary["gap_count"] - len(gaps)
+                lines.append(f"    gaps: {shown}{f' (+{more} more)' if more else ''}")
+        return "\n".join(lines)
+
+    def save(self, path):
+        """
+        Writes the summary of all tracked devices to a JSON file.
+        """
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def maybe_report(self):
+        """
+        Prints the report if the report interval has elapsed.
+        """
+        now = time.time()
+        if now - self.last_report >= self.report_interval:
+            self.last_report = now
+            print(self.report())
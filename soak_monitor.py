@@ -0,0 +1,209 @@
+import functools
+import gc
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+
+# Number of allocation sites and object types logged per sample
+TOP_ALLOCATIONS = 10
+TOP_TYPES = 10
+
+# Growth is flagged when a metric rose by more than GROWTH_THRESHOLD (relative
+# to the start of the window) over the last GROWTH_WINDOW samples, and kept
+# rising in both halves of the window
+GROWTH_WINDOW = 30
+GROWTH_THRESHOLD = 0.05
+GROWTH_METRICS = ["rss_mb", "traced_mb", "objects", "sockets"]
+
+
+def read_rss_mb():
+    """
+    Current resident set size of this process in MB, or None if unavailable.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def count_open_files():
+    """
+    Counts open file descriptors and sockets of this process.
+    Returns (None, None) where /proc is not available.
+    """
+    try:
+        fds = os.listdir("/proc/self/fd")
+    except OSError:
+        return None, None
+    sockets = 0
+    for fd in fds:
+        try:
+            if os.readlink(f"/proc/self/fd/{fd}").startswith("socket:"):
+                sockets += 1
+        except OSError:
+            pass  # Closed while listing
+    return len(fds), sockets
+
+
+def slope(values):
+    """
+    Least-squares slope of the values per sample.
+    """
+    n = len(values)
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    return (sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+            / sum((x - mean_x) ** 2 for x in range(n)))
+
+
+def is_growing(values):
+    """
+    Returns True if the values show sustained growth rather than noise or a
+    single step, such as one extra socket after a reconnect.
+
+    >>> is_growing([10 + i for i in range(30)])
+    True
+    >>> is_growing([10 + 3 * (i // 10) for i in range(30)])
+    True
+    >>> is_growing([1] * 29 + [2])
+    False
+    >>> is_growing([50.0] * 25 + [60.0] * 5)
+    False
+    >>> is_growing([50.0] * 5 + [60.0] * 25)
+    False
+    >>> is_growing([100 + (i % 2) for i in range(30)])
+    False
+    """
+    n = len(values)
+    half = n // 2
+    rise = slope(values) * (n - 1)
+    base = max(abs(values[0]), 1)
+    return (rise / base > GROWTH_THRESHOLD
+            and slope(values[:half]) > 0 and slope(values[half:]) > 0)
+
+
+class SoakMonitor:
+    """
+    Samples memory, allocation sites, object counts, open sockets and
+    per-message CPU time of the running script, and appends them as JSON
+    lines to a log file for long unattended runs.
+
+    Sustained growth of a metric over the last GROWTH_WINDOW samples is
+    printed as a warning and recorded in the sample's "growth" field.
+    """
+
+    def __init__(self, path, interval=60):
+        self.path = path
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.messages = 0
+        self.message_cpu = 0.0
+        self.history = deque(maxlen=GROWTH_WINDOW)
+        self.started = None
+        self.baseline = None
+
+    def start(self):
+        tracemalloc.start()
+        self.started = time.time()
+        self.baseline = self.take_snapshot()
+        threading.Thread(target=self.run, daemon=True).start()
+        print(f"Soak mode: sampling every {self.interval}s to {self.path}")
+
+    def record_message(self, cpu_seconds):
+        """
+        Records the CPU time spent handling one message.
+        """
+        with self.lock:
+            self.messages += 1
+            self.message_cpu += cpu_seconds
+
+    def wrap(self, func):
+        """
+        Wraps a message handler so its CPU time is recorded on every call.
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record_message(time.thread_time() - start)
+        return wrapper
+
+    def take_snapshot(self):
+        # Leave out the allocations of tracemalloc itself
+        return tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),))
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                sample = self.sample()
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(sample) + "\n")
+            except Exception as e:
+                print(f"Error in soak monitor: {e}")
+
+    def sample(self):
+        with self.lock:
+            messages, message_cpu = self.messages, self.message_cpu
+            self.messages, self.message_cpu = 0, 0.0
+
+        open_files, sockets = count_open_files()
+        traced, traced_peak = tracemalloc.get_traced_memory()
+
+        # Allocation sites that grew the most since the monitor started
+        top_allocations = [
+            {"location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+             "size_kb": stat.size / 1024,
+             "size_diff_kb": stat.size_diff / 1024,
+             "count": stat.count}
+            for stat in self.take_snapshot().compare_to(self.baseline, "lineno")[:TOP_ALLOCATIONS]
+        ]
+
+        objects = gc.get_objects()
+        top_types = Counter(type(obj).__name__ for obj in objects).most_common(TOP_TYPES)
+
+        sample = {
+            "time": time.time(),
+            "uptime": time.time() - self.started,
+            "rss_mb": read_rss_mb(),
+            "traced_mb": traced / (1024 * 1024),
+            "traced_peak_mb": traced_peak / (1024 * 1024),
+            "objects": len(objects),
+            "top_types": dict(top_types),
+            "open_files": open_files,
+            "sockets": sockets,
+            "threads": threading.active_count(),
+            "messages": messages,
+            "cpu_per_message_ms": 1000 * message_cpu / messages if messages else None,
+            "top_allocations": top_allocations,
+        }
+        del objects
+
+        self.history.append(sample)
+        sample["growth"] = self.check_growth()
+        return sample
+
+    def check_growth(self):
+        """
+        Returns the metrics showing sustained growth over the window.
+        """
+        if len(self.history) < GROWTH_WINDOW:
+            return []
+        growing = []
+        for metric in GROWTH_METRICS:
+            values = [sample[metric] for sample in self.history]
+            if None not in values and is_growing(values):
+                growing.append(metric)
+        if growing:
+            first, last = self.history[0], self.history[-1]
+            changes = ", ".join(f"{metric} {first[metric]:g} -> {last[metric]:g}" for metric in growing)
+            print(f"Warning: sustained growth over the last {len(self.history)} soak samples: {changes}")
+        return growing